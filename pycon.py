@@ -5,9 +5,11 @@ import ast
 import shutil
 
 def check_types(file_path: str) -> None:
-    result = subprocess.run(['python3', '-m', 'mypy', '--strict', file_path], capture_output=True)
-    if result.returncode != 0:
-        print(result.stdout.decode())
+    # in-process: no interpreter start-up or fork/exec per check
+    from mypy import api
+    stdout, stderr, code = api.run(['--strict', file_path])
+    if code != 0:
+        print(stdout)
         sys.exit(1)
 
 def check_dynamic_imports(file_path: str) -> None:
@@ -15,62 +15,256 @@ This prototype:
 Dependencies (recommended):
   pip install black libcst pip-audit packaging
 
+Optional speed-ups:
+  pip install rapidfuzz numpy   # C typo scan (preferred)
+  pip install numba numpy       # JIT typo scan for large modules, if no rapidfuzz
+  pip install orjson            # faster --report json
+
 """
 from __future__ import annotations
 import argparse
 import ast
+import hashlib
+import importlib.util
 import os
+import sqlite3
 import sys
 import re
 import json
 from collections import Counter, defaultdict
-from difflib import get_close_matches
-from typing import List, Tuple, Dict, Set
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from difflib import SequenceMatcher
+from typing import TYPE_CHECKING, Any, Callable, List, Tuple, Dict, Set, Union
 
 # Optional libs
-try:
-    import libcst as cst
-    from libcst.metadata import PositionProvider, MetadataWrapper
-    HAVE_LIBCST = True
-except Exception:
-    HAVE_LIBCST = False
+# Only probed here (find_spec doesn't import); the modules themselves are loaded
+# on first use, so analysis-only runs never pay for black/libcst/numba imports.
+# A module that is found but fails to import clears its flag at that point and
+# the caller takes its fallback path.
+def _have(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+HAVE_LIBCST = _have("libcst")
+HAVE_BLACK = _have("black")
+# pip-audit is optional for security checks
+HAVE_PIP_AUDIT = _have("pip_audit")
+# numpy backs the rapidfuzz and numba typo-scan backends
+HAVE_NUMPY = _have("numpy")
+# rapidfuzz runs the pairwise typo scan in C
+HAVE_RAPIDFUZZ = _have("rapidfuzz") and HAVE_NUMPY
+# numba speeds up the pairwise typo scan on large modules
+HAVE_NUMBA = _have("numba") and HAVE_NUMPY
+# orjson encodes large --report json output much faster than the stdlib
+HAVE_ORJSON = _have("orjson")
 
-try:
+if TYPE_CHECKING:
     import black
-    HAVE_BLACK = True
-except Exception:
-    HAVE_BLACK = False
+    import libcst as cst
+    import numpy as np
+else:
+    cst = None
+    black = None
+    np = None
+
+def _get_libcst():
+    """The libcst module, or None (clearing HAVE_LIBCST) when it can't be imported."""
+    global cst, HAVE_LIBCST
+    if cst is None and HAVE_LIBCST:
+        try:
+            import libcst as _cst
+        except ImportError:
+            HAVE_LIBCST = False
+        else:
+            cst = _cst
+    return cst
 
-try:
-    # pip-audit is optional for security checks
-    import pip_audit
-    HAVE_PIP_AUDIT = True
-except Exception:
-    HAVE_PIP_AUDIT = False
+def _get_black():
+    """The black module, or None (clearing HAVE_BLACK) when it can't be imported."""
+    global black, HAVE_BLACK
+    if black is None and HAVE_BLACK:
+        try:
+            import black as _black
+        except ImportError:
+            HAVE_BLACK = False
+        else:
+            black = _black
+    return black
+
+def _get_numpy():
+    """The numpy module, or None (clearing HAVE_NUMPY) when it can't be imported."""
+    global np, HAVE_NUMPY
+    if np is None and HAVE_NUMPY:
+        try:
+            import numpy as _np
+        except ImportError:
+            HAVE_NUMPY = False
+        else:
+            np = _np
+    return np
 
 # --- Utilities ---------------------------------------------------------------
 
 PY_EXT = ".py"
 
+# compiled once; these run per line / per file
+_LEAD_WS = re.compile(rb"^[ \t]+", re.MULTILINE)
+_LEAD_TABS = re.compile(r"^\t+", re.MULTILINE)
+_TRAIL_WS = re.compile(r"[ \t]+$", re.MULTILINE)
+
+# never descended into when scanning a directory
+SKIP_DIRS = {".git", ".venv", "venv", "__pycache__", "node_modules", ".mypy_cache",
+             ".tox", ".nox", "build", "dist"}
+
+def _walk(path: str, out: List[str]):
+    # DirEntry caches the type from the directory read, so no extra stat per entry
+    try:
+        entries = os.scandir(path)
+    except OSError:
+        return
+    with entries:
+        for de in entries:
+            if de.is_dir(follow_symlinks=False):
+                if de.name not in SKIP_DIRS:
+                    _walk(de.path, out)
+            elif de.name.endswith(PY_EXT):
+                out.append(de.path)
+
 def find_python_files(paths: List[str]) -> List[str]:
     files = []
     for p in paths or ["."]:
         if os.path.isfile(p) and p.endswith(PY_EXT):
             files.append(os.path.abspath(p))
         elif os.path.isdir(p):
-            for root, _, fnames in os.walk(p):
-                for f in fnames:
-                    if f.endswith(PY_EXT):
-                        files.append(os.path.join(root, f))
+            _walk(p, files)
     return sorted(set(files))
 
-def read_file(path: str) -> str:
-    with open(path, "r", encoding="utf-8") as f:
+def read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
         return f.read()
 
+def decode_source(data: bytes) -> str:
+    # same result as a text-mode utf-8 read (universal newlines)
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
 def write_file(path: str, text: str):
     with open(path, "w", encoding="utf-8", newline="\n") as f:
         f.write(text)
+    cache_invalidate(path)
+
+# --- Persistent analysis cache ----------------------------------------------
+
+# per-user cache dir: the cache is only ever written and read by its owner
+_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "pymax")
+_CACHE_PATH = os.path.join(_CACHE_DIR, "cache.sqlite")
+
+def _source_version() -> int:
+    """
+    Hash of this file, as a cache version. Rows hold analysis results, so any
+    change to the analysis code (not just to the row layout) must invalidate them.
+    """
+    try:
+        with open(__file__, "rb") as f:
+            digest = hashlib.sha256(f.read()).digest()
+    except OSError:
+        # no source next to the bytecode; fall back to a fixed version
+        return 0
+    # PRAGMA user_version is a signed 32-bit int
+    return int.from_bytes(digest[:4], "big") >> 1
+
+# stale tables (any other version of pymax) are dropped on connect
+_CACHE_VERSION = _source_version()
+
+def _cache_connect() -> sqlite3.Connection:
+    os.makedirs(_CACHE_DIR, mode=0o700, exist_ok=True)
+    os.chmod(_CACHE_DIR, 0o700)
+    conn = sqlite3.connect(_CACHE_PATH, timeout=5)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != _CACHE_VERSION:
+        conn.execute("DROP TABLE IF EXISTS asts")
+        conn.execute(f"PRAGMA user_version = {_CACHE_VERSION}")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS asts("
+        "path TEXT, sha TEXT, counts TEXT, imports TEXT, unused TEXT, "
+        "PRIMARY KEY(path, sha))"
+    )
+    return conn
+
+def cache_lookup(path: str, sha: str):
+    """
+    Return (counts, imports, unused) for a previously analyzed
+    (path, content hash), or None on a miss. Cache failures count as misses.
+    """
+    try:
+        conn = _cache_connect()
+        try:
+            row = conn.execute(
+                "SELECT counts, imports, unused FROM asts WHERE path=? AND sha=?",
+                (os.path.abspath(path), sha),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        # plain JSON only, never pickle: loading a row must not be able to run code
+        counts, imports, unused = (json.loads(col) for col in row)
+        return counts, set(imports), unused
+    except Exception:
+        return None
+
+def cache_store(path: str, sha: str, counts: Dict[str, List[int]], imports: Set[str], unused: List[str]):
+    try:
+        conn = _cache_connect()
+        try:
+            with conn:
+                # one row per path: hashes of earlier versions of the file are dead
+                conn.execute("DELETE FROM asts WHERE path=? AND sha!=?", (os.path.abspath(path), sha))
+                conn.execute(
+                    "INSERT OR REPLACE INTO asts(path, sha, counts, imports, unused) VALUES (?, ?, ?, ?, ?)",
+                    (os.path.abspath(path), sha, json.dumps(counts),
+                     json.dumps(sorted(imports)), json.dumps(unused)),
+                )
+        finally:
+            conn.close()
+    except Exception:
+        pass
+
+def cache_invalidate(path: str):
+    try:
+        conn = _cache_connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM asts WHERE path=?", (os.path.abspath(path),))
+        finally:
+            conn.close()
+    except Exception:
+        pass
+
+# --- Black formatting (memoized) --------------------------------------------
+
+def black_format(src: str, memo: Dict[bytes, str]) -> str:
+    """
+    Format with black, memoized in `memo` (blake2b(source) -> output). Black is
+    idempotent, so outputs are stored under their own hash too and re-formatting
+    an already formatted text is free. Callers pass one memo per file, so it
+    lives exactly as long as that file's passes.
+    """
+    if _get_black() is None:
+        raise RuntimeError("black not available")
+    h = hashlib.blake2b(src.encode("utf-8"), digest_size=16).digest()
+    if h in memo:
+        return memo[h]
+    try:
+        out = black.format_file_contents(src, fast=False, mode=black.Mode())
+    except black.NothingChanged:
+        out = src
+    memo[h] = out
+    if out is not src:
+        memo[hashlib.blake2b(out.encode("utf-8"), digest_size=16).digest()] = out
+    return out
 
 # --- Simple formatting fallback ---------------------------------------------
 
@@ -83,130 +277,284 @@ def normalize_whitespace(text: str, indent_size: int = 4) -> Tuple[str, List[str
     Returns (new_text, list_of_messages)
     """
     msgs = []
-    lines = text.splitlines()
-    new_lines = []
-    seen_indent_patterns = set()
-    for i, ln in enumerate(lines, 1):
-        # strip trailing spaces
-        stripped = ln.rstrip("\r\n")
-        if stripped != ln:
-            msgs.append(f"Line {i}: trailing whitespace removed")
-        ln = stripped
-
-        # detect tabs vs spaces
-        m = re.match(r"^([ \t]+)", ln)
-        if m:
-            indent = m.group(1)
-            seen_indent_patterns.add(indent)
-            if "\t" in indent:
-                # convert tabs -> spaces (one tab -> 4 spaces)
-                ln = re.sub(r"^\t+", lambda mo: " " * (4 * len(mo.group(0))), ln)
-                msgs.append(f"Line {i}: converted leading tabs to spaces")
-        new_lines.append(ln)
-    # try to guess indent size: check common multiples
+    # whole-text substitutions; subn also gives us the per-kind line counts
+    new_text, n_trail = _TRAIL_WS.subn("", text)
+    if n_trail:
+        msgs.append(f"Removed trailing whitespace on {n_trail} line(s)")
+    # convert tabs -> spaces (one tab -> 4 spaces)
+    new_text, n_tabs = _LEAD_TABS.subn(lambda mo: " " * (4 * len(mo.group(0))), new_text)
+    if n_tabs:
+        msgs.append(f"Converted leading tabs to spaces on {n_tabs} line(s)")
     # (We keep simple: convert tabs -> 4 spaces, do not reflow code)
-    return ("\n".join(new_lines) + ("\n" if text.endswith("\n") else ""), msgs)
+    return (new_text, msgs)
 
 # --- AST utilities for identifier collection -------------------------------
 
-class IdentifierCollector(ast.NodeVisitor):
+# slots in IdentifierCollector.counts[name]
+NAME, ATTR, ASSIGNED, FUNC_DEF = range(4)
+
+class IdentifierCollector:
+    """
+    Identifier tallies for one module; filled in by collect().
+    counts maps each (interned) identifier to [name, attr, assigned, func_def]
+    occurrence counts, so one dict lookup serves every kind.
+    """
     def __init__(self):
-        self.names: Counter[str] = Counter()
+        self.counts: Dict[str, List[int]] = {}
         self.scoped_names: Dict[str, List[str]] = defaultdict(list)
         self.imports: Set[str] = set()
-        self.assigned: Counter[str] = Counter()
-        self.attr_names: Counter[str] = Counter()
-        self.func_defs: Counter[str] = Counter()
-
-    def visit_Name(self, node: ast.Name):
-        self.names[node.id] += 1
-        self.generic_visit(node)
-
-    def visit_Attribute(self, node: ast.Attribute):
-        # attribute.x -> collect 'x' as attribute name
-        if isinstance(node.attr, ast.expr) and hasattr(node.attr, "id"):
-            # weird case; ignore
-            pass
-        elif isinstance(node.attr, ast.AST):
-            # attribute attr
-            try:
-                attr_name = node.attr.attr
-            except Exception:
-                attr_name = None
-            if attr_name:
-                self.attr_names[attr_name] += 1
-        else:
-            # last resort: fallback str()
-            try:
-                self.attr_names[getattr(node.attr, "id", str(node.attr))] += 1
-            except Exception:
-                pass
-        self.generic_visit(node)
-
-    def visit_Assign(self, node: ast.Assign):
-        for t in node.targets:
-            if isinstance(t, ast.Name):
-                self.assigned[t.id] += 1
-        self.generic_visit(node)
-
-    def visit_AnnAssign(self, node: ast.AnnAssign):
-        target = node.target
-        if isinstance(target, ast.Name):
-            self.assigned[target.id] += 1
-        self.generic_visit(node)
-
-    def visit_Import(self, node: ast.Import):
-        for n in node.names:
-            self.imports.add(n.name.split(".")[0])
-        self.generic_visit(node)
-
-    def visit_ImportFrom(self, node: ast.ImportFrom):
-        if node.module:
-            self.imports.add(node.module.split(".")[0])
-        for n in node.names:
-            if n.name != "*":
-                self.imports.add(n.name.split(".")[0])
-        self.generic_visit(node)
-
-    def visit_FunctionDef(self, node: ast.FunctionDef):
-        self.func_defs[node.name] += 1
-        self.generic_visit(node)
+
+def _bump(counts: Dict[str, List[int]], key: str, idx: int):
+    arr = counts.get(key)
+    if arr is None:
+        arr = counts[sys.intern(key)] = [0, 0, 0, 0]
+    arr[idx] += 1
+
+def _on_name(node: ast.Name, c: IdentifierCollector):
+    _bump(c.counts, node.id, NAME)
+
+def _on_attribute(node: ast.Attribute, c: IdentifierCollector):
+    # attribute.x -> collect 'x' as attribute name
+    _bump(c.counts, node.attr, ATTR)
+
+def _on_assign(node: ast.Assign, c: IdentifierCollector):
+    for target in node.targets:
+        if target.__class__ is ast.Name:
+            _bump(c.counts, target.id, ASSIGNED)
+
+def _on_ann_assign(node: ast.AnnAssign, c: IdentifierCollector):
+    if node.target.__class__ is ast.Name:
+        _bump(c.counts, node.target.id, ASSIGNED)
+
+def _on_import(node: ast.Import, c: IdentifierCollector):
+    for n in node.names:
+        c.imports.add(n.name.split(".")[0])
+
+def _on_import_from(node: ast.ImportFrom, c: IdentifierCollector):
+    if node.module:
+        c.imports.add(node.module.split(".")[0])
+    for n in node.names:
+        if n.name != "*":
+            c.imports.add(n.name.split(".")[0])
+
+def _on_function_def(node: ast.FunctionDef, c: IdentifierCollector):
+    _bump(c.counts, node.name, FUNC_DEF)
+
+# keyed by exact node class: one dict probe per node, no isinstance chain
+_COLLECT_DISPATCH: Dict[type, Callable[[Any, IdentifierCollector], None]] = {
+    ast.Name: _on_name,
+    ast.Attribute: _on_attribute,
+    ast.Assign: _on_assign,
+    ast.AnnAssign: _on_ann_assign,
+    ast.Import: _on_import,
+    ast.ImportFrom: _on_import_from,
+    ast.FunctionDef: _on_function_def,
+}
+
+def collect(tree: ast.AST) -> IdentifierCollector:
+    """
+    Tally identifiers in a single ast.walk pass, dispatching on the exact node
+    class instead of going through NodeVisitor.visit/generic_visit per node.
+    """
+    collector = IdentifierCollector()
+    dispatch = _COLLECT_DISPATCH.get
+    for node in ast.walk(tree):
+        handler = dispatch(node.__class__)
+        if handler is not None:
+            handler(node, collector)
+    return collector
 
 # --- Identifier typo detection ----------------------------------------------
 
+# plain Python source of the numba kernel; njit-compiled by _get_pairwise_close()
+def _pairwise_close_py(codes, offsets, lens, threshold, start, stop):
+    """
+    Similarity scores for rows start..stop-1 as a (stop - start) x n uint8 block:
+    hits[i - start, j], for j > i, is the similarity as a rounded percentage
+    when it is >= threshold and 0 otherwise. Similarity is the normalized
+    insert/delete distance, 1 - distance / (len_a + len_b), the same 2*M/T
+    measure as rapidfuzz's fuzz.ratio. Names are stored back to back in
+    `codes`, name k spanning offsets[k]:offsets[k]+lens[k].
+    """
+    n = lens.shape[0]
+    max_len = 0
+    for k in range(n):
+        if lens[k] > max_len:
+            max_len = lens[k]
+    hits = np.zeros((stop - start, n), np.uint8)
+    for i in prange(start, stop):
+        # single DP row, reused for every j compared against i
+        row = np.empty(max_len + 1, np.int64)
+        oa = offsets[i]
+        la = lens[i]
+        for j in range(i + 1, n):
+            ob = offsets[j]
+            lb = lens[j]
+            total = la + lb
+            if total == 0:
+                continue
+            # the length difference alone bounds the distance from below
+            if 1.0 - abs(la - lb) / total < threshold:
+                continue
+            for b in range(lb + 1):
+                row[b] = b
+            for a in range(1, la + 1):
+                prev = row[0]
+                row[0] = a
+                ca = codes[oa + a - 1]
+                for b in range(1, lb + 1):
+                    cur = row[b]
+                    # no substitutions: a mismatch costs a delete plus an insert
+                    best = cur + 1
+                    if row[b - 1] + 1 < best:
+                        best = row[b - 1] + 1
+                    if ca == codes[ob + b - 1] and prev < best:
+                        best = prev
+                    row[b] = best
+                    prev = cur
+            similarity = 1.0 - row[lb] / total
+            if similarity >= threshold:
+                # round half up, like rapidfuzz's integer score dtypes
+                hits[i - start, j] = int(similarity * 100.0 + 0.5)
+    return hits
+
+# compiled kernel, bound on first use
+_pairwise_close = None
+# numba.prange, rebound by _get_pairwise_close(). It has to be a module global:
+# numba resolves the kernel's free names from this module's globals when it
+# compiles (and when it validates a cache=True entry), so a local import or a
+# closure variable would not be seen by the kernel.
+prange: Any = None
+
+def _get_pairwise_close():
+    """The compiled kernel, or None (clearing HAVE_NUMBA) when numba can't be imported."""
+    global _pairwise_close, prange, HAVE_NUMBA
+    if _pairwise_close is None and HAVE_NUMBA:
+        # the kernel body reads the module-global np
+        if _get_numpy() is None:
+            return None
+        try:
+            from numba import njit, prange, set_num_threads
+        except ImportError:
+            HAVE_NUMBA = False
+            return None
+        _pairwise_close = njit(parallel=True, cache=True)(_pairwise_close_py)
+        if _IN_POOL:
+            # the pool already runs one worker per core; don't fan out again
+            set_num_threads(1)
+    return _pairwise_close
+
+# rows of the similarity matrix scored per rapidfuzz cdist / numba kernel call
+_CDIST_ROWS = 1024
+# below this many unique names difflib is faster than compiling the numba kernel
+_NUMBA_MIN_NAMES = 1000
+
+def _indel_similarity(a: str, b: str) -> float:
+    """2*LCS/T of two strings: fuzz.ratio's measure, in pure Python."""
+    prev = [0] * (len(b) + 1)
+    for ca in a:
+        cur = [0]
+        for k, cb in enumerate(b):
+            cur.append(prev[k] + 1 if ca == cb else max(prev[k + 1], cur[k]))
+        prev = cur
+    return 2.0 * prev[-1] / (len(a) + len(b))
+
+def close_name_pairs(uniq: List[str], threshold: float) -> List[Tuple[str, str, int]]:
+    """
+    (name, match, score) triples of distinct, similar identifiers from `uniq`,
+    score being the 2*M/T similarity as a rounded percentage. Every backend
+    scores on that scale; callers must not rely on the order of the triples.
+    Uses rapidfuzz when available, then the numba kernel, then difflib.
+    """
+    global HAVE_RAPIDFUZZ
+    if HAVE_RAPIDFUZZ and uniq and _get_numpy() is not None:
+        try:
+            from rapidfuzz import process as rf_process, fuzz as rf_fuzz
+        except ImportError:
+            HAVE_RAPIDFUZZ = False
+        else:
+            pairs: List[Tuple[str, str, int]] = []
+            # uint8 scores in row blocks: at most _CDIST_ROWS * n bytes live at once
+            for start in range(0, len(uniq), _CDIST_ROWS):
+                scores = rf_process.cdist(uniq[start:start + _CDIST_ROWS], uniq, scorer=rf_fuzz.ratio,
+                                          score_cutoff=threshold * 100, dtype=np.uint8,
+                                          workers=1 if _IN_POOL else -1)
+                pairs.extend((uniq[start + i], uniq[j], int(scores[i, j]))
+                             for i, j in np.argwhere(scores) if start + i != j)
+            return pairs
+    # the kernel's first JIT compile costs seconds; difflib wins on small modules
+    pairwise_close = None
+    if HAVE_NUMBA and len(uniq) >= _NUMBA_MIN_NAMES and _get_numpy() is not None:
+        pairwise_close = _get_pairwise_close()
+    if pairwise_close is not None:
+        # code points, not UTF-8 bytes, so non-ASCII names score as in rapidfuzz
+        lens = np.array([len(u) for u in uniq], dtype=np.int64)
+        offsets = np.zeros(len(uniq), dtype=np.int64)
+        offsets[1:] = np.cumsum(lens)[:-1]
+        codes = np.frombuffer("".join(uniq).encode("utf-32-le"), dtype=np.uint32)
+        pairs = []
+        # the kernel fills only j > i, in row blocks to bound the hit matrix
+        for start in range(0, len(uniq), _CDIST_ROWS):
+            stop = min(start + _CDIST_ROWS, len(uniq))
+            block = pairwise_close(codes, offsets, lens, threshold, start, stop)
+            for r, j in np.argwhere(block):
+                score = int(block[r, j])
+                pairs.append((uniq[start + r], uniq[j], score))
+                pairs.append((uniq[j], uniq[start + r], score))
+        return pairs
+    pairs = []
+    # SequenceMatcher's quick ratios bound 2*LCS/T from above, so they prune
+    # safely. Its ratio() is not the LCS measure, hence the exact check after.
+    # No n cap like get_close_matches: the caller picks among all matches.
+    matcher = SequenceMatcher()
+    for name in uniq:
+        matcher.set_seq2(name)
+        for m in uniq:
+            if m == name:
+                continue
+            matcher.set_seq1(m)
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            ratio = _indel_similarity(name, m)
+            if ratio >= threshold:
+                # round half up, like rapidfuzz's integer score dtypes
+                pairs.append((name, m, int(ratio * 100 + 0.5)))
+    return pairs
+
 def detect_identifier_typos(collector: IdentifierCollector, threshold=0.85) -> Dict[str, str]:
     """
     Heuristic: If two identifiers are very similar and one is significantly more frequent,
     offer to rename the less-frequent one to the more-frequent one.
     """
-    all_names = list(collector.names.keys()) + list(collector.attr_names.keys())
-    all_counts = {**collector.names, **collector.attr_names}
-    candidates = {}
-    uniq = sorted(set(all_names))
-    for i, name in enumerate(uniq):
-        # find close matches with difflib
-        matches = get_close_matches(name, uniq, n=5, cutoff=threshold)
-        for m in matches:
-            if m == name:
+    # combined name + attribute frequency of every identifier that is used as either
+    all_counts = {k: v[NAME] + v[ATTR] for k, v in collector.counts.items() if v[NAME] or v[ATTR]}
+    # name -> (-score, match) of its best qualifying match so far
+    best: Dict[str, Tuple[int, str]] = {}
+    uniq = sorted(all_counts)
+    for name, m, score in close_name_pairs(uniq, threshold):
+        # prefer renaming the less-frequent to the more frequent
+        if all_counts.get(m, 0) > all_counts.get(name, 0) * 1.5:
+            # don't propose if one is builtin or single-char
+            if len(name) <= 1 or len(m) <= 1:
                 continue
-            # prefer renaming the less-frequent to the more frequent
-            if all_counts.get(m, 0) > all_counts.get(name, 0) * 1.5:
-                # don't propose if one is builtin or single-char
-                if len(name) <= 1 or len(m) <= 1:
-                    continue
-                # avoid renaming common words like "id" "op"
-                if name.islower() and m.islower():
-                    candidates[name] = m
-    return candidates
+            # avoid renaming common words like "id" "op"
+            if name.islower() and m.islower():
+                # highest score wins and ties go to the alphabetically first match,
+                # so the target doesn't depend on which backend found the pairs
+                if name not in best or (-score, m) < best[name]:
+                    best[name] = (-score, m)
+    return {name: best[name][1] for name in sorted(best)}
 
 # --- Safe rename via libcst (if available) ---------------------------------
 
-def apply_renames_with_libcst(source: str, renames: Dict[str, str]) -> str:
+def apply_renames_with_libcst(source, renames: Dict[str, str]):
     """
     Use libcst to do a conservative rename of identifiers in the module.
     This attempts to rename Names and Attribute.attr where applicable.
+    `source` may be code or an already parsed cst.Module; a Module comes back
+    as a Module so callers can chain edits without re-parsing.
     """
-    if not HAVE_LIBCST:
+    if _get_libcst() is None:
         raise RuntimeError("libcst not available")
 
     class Renamer(cst.CSTTransformer):
@@ -231,10 +579,49 @@ def apply_renames_with_libcst(source: str, renames: Dict[str, str]) -> str:
                 return updated_node.with_changes(name=updated_node.name.with_changes(value=self.mapping[original_node.name.value]))
             return updated_node
 
-    module = cst.parse_module(source)
+    module = source if isinstance(source, cst.Module) else cst.parse_module(source)
     transformer = Renamer(renames)
     new_mod = module.visit(transformer)
-    return new_mod.code
+    return new_mod if module is source else new_mod.code
+
+def remove_unused_imports_with_libcst(source, unused: List[str]):
+    """
+    Remove exactly the flagged import aliases in one libcst traversal, keeping the
+    rest of a multi-name import. Statements left with no names are dropped.
+    Like apply_renames_with_libcst, accepts and returns a cst.Module or code.
+    """
+    if _get_libcst() is None:
+        raise RuntimeError("libcst not available")
+
+    class UnusedImportRemover(cst.CSTTransformer):
+        def __init__(self, names):
+            self.names = set(names)
+
+        def _prune(self, updated_node, keep):
+            names = [a for a in updated_node.names if keep(a)]
+            if len(names) == len(updated_node.names):
+                return updated_node
+            if not names:
+                return cst.RemoveFromParent()
+            # a trailing comma is only legal inside parentheses
+            if getattr(updated_node, "lpar", None) is None:
+                names[-1] = names[-1].with_changes(comma=cst.MaybeSentinel.DEFAULT)
+            return updated_node.with_changes(names=names)
+
+        def leave_Import(self, original_node: cst.Import, updated_node: cst.Import):
+            # same binding rule as detect_unused_imports: "import a.b" binds "a"
+            return self._prune(updated_node, lambda a: (
+                a.evaluated_alias or a.evaluated_name.split(".")[0]) not in self.names)
+
+        def leave_ImportFrom(self, original_node: cst.ImportFrom, updated_node: cst.ImportFrom):
+            if isinstance(updated_node.names, cst.ImportStar):
+                return updated_node
+            return self._prune(updated_node, lambda a: (
+                a.evaluated_alias or a.evaluated_name) not in self.names)
+
+    module = source if isinstance(source, cst.Module) else cst.parse_module(source)
+    new_mod = module.visit(UnusedImportRemover(unused))
+    return new_mod if module is source else new_mod.code
 
 # --- Unused import detection (best-effort) ----------------------------------
 
@@ -243,29 +630,40 @@ def detect_unused_imports(tree: ast.AST) -> List[str]:
     Best-effort: find import names, then see if they appear in the AST as Name nodes.
     This will produce false positives/negatives in complicated cases (imports used via alias, getattr, exec, etc).
     """
-    imports = []
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for n in node.names:
-                imports.append(n.asname or n.name.split(".")[0])
-        elif isinstance(node, ast.ImportFrom):
-            for n in node.names:
-                if n.name == "*":
-                    # skip star imports
-                    continue
-                imports.append(n.asname or n.name)
-    used = set()
+    imports: List[str] = []
+    used: Set[str] = set()
+    Import, ImportFrom, Name = ast.Import, ast.ImportFrom, ast.Name
+    # exact-class checks don't narrow for mypy, so the walked node is untyped
+    node: Any
+    # one traversal gathers both the imported and the referenced names
     for node in ast.walk(tree):
-        if isinstance(node, ast.Name):
+        cls = node.__class__
+        if cls is Name:
             used.add(node.id)
+        elif cls is Import:
+            imports.extend(n.asname or n.name.split(".", 1)[0] for n in node.names)
+        elif cls is ImportFrom:
+            # __future__ imports are compiler directives, never "used" by name
+            if node.module == "__future__":
+                continue
+            # skip star imports
+            imports.extend(n.asname or n.name for n in node.names if n.name != "*")
     unused = [imp for imp in imports if imp not in used]
     return unused
 
 # --- Dependencies parsing ---------------------------------------------------
 
+# Parsed dependency files, keyed by (abspath, mtime) so an edited file is re-read.
+# The cached parsers return tuples; the public wrappers hand out fresh lists.
+
 def parse_requirements_txt(path: str) -> List[str]:
     if not os.path.exists(path):
         return []
+    path = os.path.abspath(path)
+    return list(_parse_requirements_cached(path, os.path.getmtime(path)))
+
+@lru_cache(maxsize=64)
+def _parse_requirements_cached(path: str, mtime: float) -> Tuple[str, ...]:
     deps = []
     with open(path, "r", encoding="utf-8") as f:
         for line in f:
@@ -273,12 +671,17 @@ def parse_requirements_txt(path: str) -> List[str]:
             if not line or line.startswith("#"):
                 continue
             deps.append(line)
-    return deps
+    return tuple(deps)
 
 def parse_pyproject_toml_for_deps(path: str) -> List[str]:
-    # Simple non-toml-parser fallback: look for [tool.poetry.dependencies] or [project] requires
     if not os.path.exists(path):
         return []
+    path = os.path.abspath(path)
+    return list(_parse_pyproject_cached(path, os.path.getmtime(path)))
+
+@lru_cache(maxsize=64)
+def _parse_pyproject_cached(path: str, mtime: float) -> Tuple[str, ...]:
+    # Simple non-toml-parser fallback: look for [tool.poetry.dependencies] or [project] requires
     deps = []
     try:
         import tomllib  # py3.11+
@@ -307,7 +710,7 @@ def parse_pyproject_toml_for_deps(path: str) -> List[str]:
                     continue
                 k = ln.split("=")[0].strip()
                 deps.append(k)
-    return deps
+    return tuple(deps)
 
 # --- Security: run pip-audit if requested ----------------------------------
 
@@ -334,7 +737,19 @@ def run_pip_audit(paths: List[str]) -> List[str]:
 
 # --- Main per-file pipeline -------------------------------------------------
 
-def process_file(path: str, args) -> Dict:
+# set in ProcessPoolExecutor workers, where the per-file backends must stay
+# single-threaded (the pool already uses every core)
+_IN_POOL = False
+
+def _init_pool_worker():
+    global _IN_POOL
+    _IN_POOL = True
+
+def process_file(path: str, args: Dict) -> Dict:
+    """
+    Run the full pipeline on one file. `args` is the plain dict form of the
+    CLI namespace (vars(args)) so the call can be shipped to worker processes.
+    """
     result = {
         "path": path,
         "formatted": False,
@@ -345,25 +760,23 @@ def process_file(path: str, args) -> Dict:
         "unused_imports": [],
         "errors": [],
     }
-    original = read_file(path)
-    text = original
+    # raw bytes: ast.parse handles BOM/coding cookies itself, so analysis-only
+    # runs never decode; the str form is only built for the --fix path
+    data = read_bytes(path)
+    original = text = decode_source(data) if args["fix"] else ""
 
     # 1) Lint: whitespace checks
     # detect mixed tabs/spaces
-    leading_patterns = set()
-    for i, ln in enumerate(original.splitlines(), 1):
-        m = re.match(r"^([ \t]+)", ln)
-        if m:
-            leading_patterns.add(m.group(1))
+    leading_patterns = set(_LEAD_WS.findall(data))
     # detect presence of both tabs and spaces in leading whitespace across file
-    has_tabs = any("\t" in p for p in leading_patterns)
-    has_spaces = any(" " in p for p in leading_patterns)
+    has_tabs = any(b"\t" in p for p in leading_patterns)
+    has_spaces = any(b" " in p for p in leading_patterns)
     if has_tabs and has_spaces:
         result["lint_messages"].append("Mixed tabs and spaces in leading indentation (file-level).")
     # detect inconsistent indent widths
     indent_counts = Counter()
     for p in leading_patterns:
-        spaces = p.count(" ")
+        spaces = p.count(b" ")
         if spaces:
             indent_counts[spaces] += 1
     if indent_counts:
@@ -373,9 +786,11 @@ def process_file(path: str, args) -> Dict:
             result["lint_messages"].append(f"Inconsistent indentation widths detected (common={common}).")
 
     # 2) Formatting: use black if installed and --no-fix not set
-    if args.fix and HAVE_BLACK:
+    # (the memo lets the final pass below skip black when nothing changed since)
+    black_memo: Dict[bytes, str] = {}
+    if args["fix"] and _get_black() is not None:
         try:
-            new_text = black.format_file_contents(original, fast=False, mode=black.Mode())
+            new_text = black_format(original, black_memo)
             if new_text != original:
                 result["formatted"] = True
                 result["format_messages"].append("Formatted with black.")
@@ -384,35 +799,61 @@ def process_file(path: str, args) -> Dict:
             result["format_messages"].append(f"Black failed: {e}")
     else:
         # fallback normalizer always runs in non--no-fix mode
-        if args.fix:
+        if args["fix"]:
             new_text, msgs = normalize_whitespace(original)
             if msgs:
                 result["formatted"] = True
                 result["format_messages"].extend(msgs)
                 text = new_text
 
-    # 3) AST analysis for identifiers
-    try:
-        tree = ast.parse(text)
-    except Exception as e:
-        result["errors"].append(f"AST parse error: {e}")
-        return result
+    # 3) AST analysis for identifiers (skipped when this exact content was analyzed before)
+    source: Union[bytes, str]
+    if args["fix"]:
+        source, sha = text, hashlib.sha256(text.encode("utf-8")).hexdigest()
+    else:
+        source, sha = data, hashlib.sha256(data).hexdigest()
+    cached = cache_lookup(path, sha)
+    if cached is not None:
+        collector = IdentifierCollector()
+        collector.counts, collector.imports, unused = cached
+    else:
+        try:
+            tree = ast.parse(source)
+        except Exception as e:
+            result["errors"].append(f"AST parse error: {e}")
+            return result
 
-    collector = IdentifierCollector()
-    collector.visit(tree)
+        collector = collect(tree)
+
+        # find unused imports
+        unused = detect_unused_imports(tree)
+        cache_store(path, sha, collector.counts, collector.imports, unused)
+
+    # libcst parse of `text`, shared by the import removal and rename edits;
+    # whenever it is not None it matches `text`
+    module = None
 
-    # find unused imports
-    unused = detect_unused_imports(tree)
     if unused:
         result["unused_imports"] = unused
-        if args.fix:
-            # attempt to remove unused imports conservatively via simple regex removal
-            # NOTE: this is a simplistic approach; better to use libcst for accurate removal.
-            new_text = text
-            for name in unused:
-                # remove "import name" or "from x import name"
-                new_text = re.sub(rf"^\s*(from\s+[^\n]+\s+import\s+.*\b{name}\b.*)$", "", new_text, flags=re.MULTILINE)
-                new_text = re.sub(rf"^\s*(import\s+.*\b{name}\b.*)$", "", new_text, flags=re.MULTILINE)
+        if args["fix"]:
+            if _get_libcst() is not None:
+                try:
+                    module = remove_unused_imports_with_libcst(cst.parse_module(text), unused)
+                    new_text = module.code
+                except Exception as e:
+                    result["errors"].append(f"libcst import removal failed: {e}")
+                    module = None
+                    new_text = text
+            else:
+                # fall back to line-based regex removal; may drop a whole
+                # multi-name import when only one of its names is unused
+                pattern = re.compile(
+                    r"^\s*(?:from\s+[^\n]+\s+import\s+.*|import\s+.*)\b(?:"
+                    + "|".join(map(re.escape, unused))
+                    + r")\b.*$",
+                    re.MULTILINE,
+                )
+                new_text = pattern.sub("", text)
             if new_text != text:
                 result["format_messages"].append(f"Removed unused import(s): {', '.join(unused)} (heuristic).")
                 text = new_text
@@ -422,12 +863,14 @@ def process_file(path: str, args) -> Dict:
     result["renames_suggested"] = typos
 
     # apply renames if requested and we have libcst
-    if args.fix and typos:
-        if HAVE_LIBCST:
+    if args["fix"] and typos:
+        if _get_libcst() is not None:
             try:
-                new_text = apply_renames_with_libcst(text, typos)
+                if module is None:
+                    module = cst.parse_module(text)
+                module = apply_renames_with_libcst(module, typos)
                 result["renames_applied"] = typos.copy()
-                text = new_text
+                text = module.code
                 result["format_messages"].append(f"Applied {len(typos)} identifier rename(s) using libcst.")
             except Exception as e:
                 result["errors"].append(f"libcst rename failed: {e}")
@@ -435,9 +878,10 @@ def process_file(path: str, args) -> Dict:
             result["lint_messages"].append("libcst not installed; suggested renames not applied. Install 'libcst' to auto-apply renames.")
 
     # final format pass with black if available & fix mode
-    if args.fix and HAVE_BLACK:
+    # (a memo hit when neither import removal nor renames changed the text)
+    if args["fix"] and _get_black() is not None:
         try:
-            new_text = black.format_file_contents(text, fast=False, mode=black.Mode())
+            new_text = black_format(text, black_memo)
             if new_text != text:
                 result["formatted"] = True
                 result["format_messages"].append("Final pass: formatted with black.")
@@ -446,13 +890,32 @@ def process_file(path: str, args) -> Dict:
             result["format_messages"].append(f"Black final pass failed: {e}")
 
     # Write back if changes and not no-fix
-    if args.fix and text != original:
+    if args["fix"] and text != original:
         write_file(path, text)
 
     return result
 
 # --- CLI / Orchestration ----------------------------------------------------
 
+def _json_default(o):
+    # Counters/mappings, sets and anything else neither encoder takes natively
+    if isinstance(o, dict):
+        return dict(o)
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    return str(o)
+
+def dumps_report(obj) -> str:
+    global HAVE_ORJSON
+    if HAVE_ORJSON:
+        try:
+            import orjson
+        except ImportError:
+            HAVE_ORJSON = False
+        else:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=_json_default).decode()
+    return json.dumps(obj, indent=2, default=_json_default)
+
 def parse_args():
     p = argparse.ArgumentParser(prog="pymax", description="pymax: formatter + linter + dependency analyzer (prototype)")
     p.add_argument("paths", nargs="*", help="File or directory paths to process (default: .)")
@@ -468,7 +931,11 @@ def gather_project_deps(start_paths: List[str]) -> List[str]:
     # look for requirements.txt upwards from each path, and pyproject.toml in root
     visited = set()
     for p in start_paths or ["./"]:
-        root = p if os.path.isdir(p) else os.path.dirname(os.path.abspath(p)) or "."
+        root = os.path.abspath(p if os.path.isdir(p) else os.path.dirname(os.path.abspath(p)) or ".")
+        # several paths often share a root; read its files once
+        if root in visited:
+            continue
+        visited.add(root)
         # check common files in root
         req = os.path.join(root, "requirements.txt")
         deps.extend(parse_requirements_txt(req))
@@ -485,10 +952,20 @@ def main():
         print("No python files found.", file=sys.stderr)
         sys.exit(1)
 
-    results = []
-    for f in files:
-        res = process_file(f, args)
-        results.append(res)
+    # files are independent; small runs aren't worth the pool start-up
+    worker = partial(process_file, args=vars(args))
+    if len(files) < 4:
+        results = [worker(f) for f in files]
+    else:
+        # forkserver keeps already-imported libcst/black state out of the workers;
+        # it isn't available everywhere (e.g. Windows), so fall back to the default
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("forkserver")
+        else:
+            ctx = multiprocessing.get_context()
+        chunksize = max(1, len(files) // (4 * (os.cpu_count() or 1)))
+        with ProcessPoolExecutor(mp_context=ctx, initializer=_init_pool_worker) as ex:
+            results = list(ex.map(worker, files, chunksize=chunksize))
 
     deps = gather_project_deps(args.paths)
     security_findings = []
@@ -505,7 +982,7 @@ def main():
 
     # output
     if args.report == "json":
-        print(json.dumps(summary, indent=2))
+        print(dumps_report(summary))
     else:
         print(f"✨ pymax finished: {len(files)} file(s) processed\n")
         total_fixed = 0
@@ -4,13 +4,29 @@ import sys
 import inspect
 import argparse
 from types import FunctionType
-from typing import get_type_hints
+from typing import Dict, NamedTuple, Optional, Union, get_type_hints
+
+class FuncInfo(NamedTuple):
+    """Static view of a module-level function, taken from the parsed AST."""
+    name: str
+    node: Union[ast.FunctionDef, ast.AsyncFunctionDef]
+    args_annotations: Dict[str, str]
+
+def _func_info(node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> FuncInfo:
+    a = node.args
+    params = a.posonlyargs + a.args + a.kwonlyargs + [p for p in (a.vararg, a.kwarg) if p]
+    return FuncInfo(
+        name=node.name,
+        node=node,
+        args_annotations={p.arg: ast.unparse(p.annotation) for p in params if p.annotation},
+    )
 
 class VyreChecker:
-    def __init__(self, filename: str, strict: bool = False, strictness: int = 0):
+    def __init__(self, filename: str, strict: bool = False, strictness: int = 0, unsafe_exec: bool = False):
         self.filename = filename
         self.strict = strict
         self.strictness = strictness
+        self.unsafe_exec = unsafe_exec
         self.warnings = []
         self.errors = []
 
@@ -20,14 +36,22 @@ class VyreChecker:
             source = f.read()
         tree = ast.parse(source, filename=self.filename)
 
-        # Compile the file to capture actual objects
+        # Module-level functions, later definitions winning like they would at runtime
+        funcs = {
+            n.name: _func_info(n)
+            for n in tree.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+        }
+
+        # Executing the module runs arbitrary code (and its imports), so the
+        # runtime checks that need real function objects are opt-in
         namespace = {}
-        exec(compile(tree, filename=self.filename, mode='exec'), namespace)
+        if self.unsafe_exec:
+            exec(compile(tree, filename=self.filename, mode='exec'), namespace)
 
         # Iterate over functions
-        for name, obj in namespace.items():
-            if isinstance(obj, FunctionType):
-                self._check_function(name, obj)
+        for name, info in funcs.items():
+            obj = namespace.get(name)
+            self._check_function(info, obj if isinstance(obj, FunctionType) else None)
 
         # Print results
         for w in self.warnings:
@@ -37,25 +61,27 @@ class VyreChecker:
         if self.errors and self.strict:
             sys.exit(1)
 
-    def _check_function(self, name: str, func: FunctionType):
-        # Type hints
-        hints = get_type_hints(func)
-        # Check return type
-        sig = inspect.signature(func)
-        try:
-            result = func(*[self._dummy_value(param.annotation) for param in sig.parameters.values()])
-            if 'return' in hints and not isinstance(result, hints['return']):
-                msg = f"Function '{name}' return type potential mismatch: expected {hints['return']}, got {type(result)}"
-                self._report(msg, error=True)
-        except Exception:
-            # Cannot execute function safely, skip
-            pass
-
-        # Check variable names in locals for potential overrides
-        local_vars = func.__code__.co_varnames
-        if len(local_vars) != len(set(local_vars)):
-            msg = f"Function '{name}' potential variable name override"
-            self._report(msg, error=self.strictness==2)
+    def _check_function(self, info: FuncInfo, func: Optional[FunctionType] = None):
+        name = info.name
+        if func is not None:
+            # Type hints
+            hints = get_type_hints(func)
+            # Check return type
+            sig = inspect.signature(func)
+            try:
+                result = func(*[self._dummy_value(param.annotation) for param in sig.parameters.values()])
+                if 'return' in hints and not isinstance(result, hints['return']):
+                    msg = f"Function '{name}' return type potential mismatch: expected {hints['return']}, got {type(result)}"
+                    self._report(msg, error=True)
+            except Exception:
+                # Cannot execute function safely, skip
+                pass
+
+            # Check variable names in locals for potential overrides
+            local_vars = func.__code__.co_varnames
+            if len(local_vars) != len(set(local_vars)):
+                msg = f"Function '{name}' potential variable name override"
+                self._report(msg, error=self.strictness==2)
 
         # Check function name override in globals
         # (only if strictness >= 1)
@@ -66,16 +92,17 @@ class VyreChecker:
 
         # Special warnings
         if self.strictness >= 2:
-            # Simple heuristic for infinite loop: while True in source
-            if "while True" in inspect.getsource(func):
+            # Simple heuristic for infinite loop: a `while True` anywhere in the body
+            if any(isinstance(n, ast.While) and isinstance(n.test, ast.Constant) and n.test.value is True
+                   for n in ast.walk(info.node)):
                 msg = f"Potential infinite loop found in function '{name}'"
                 self._report(msg, error=self.strictness==2)
 
             # Unoptimized code heuristic: multiple assignments without type hints
-            assignments = [n for n in ast.walk(ast.parse(inspect.getsource(func))) if isinstance(n, ast.Assign)]
+            assignments = [n for n in ast.walk(info.node) if isinstance(n, ast.Assign)]
             for a in assignments:
                 for target in a.targets:
-                    if isinstance(target, ast.Name) and target.id not in func.__annotations__:
+                    if isinstance(target, ast.Name) and target.id not in info.args_annotations:
                         msg = f"Potential unoptimized code found: '{target.id}' has no type hint in '{name}'"
                         self._report(msg, error=False)
 
@@ -107,9 +134,10 @@ def main():
     parser.add_argument("file", help="Python file to check")
     parser.add_argument("--strict", action="store_true", help="Turn warnings into errors")
     parser.add_argument("--strictness", type=int, choices=[0,1,2], default=0, help="Set strictness level (0-2)")
+    parser.add_argument("--unsafe-exec", action="store_true", help="Execute the module to run return-type checks on real functions")
     args = parser.parse_args()
 
-    checker = VyreChecker(args.file, strict=args.strict, strictness=args.strictness)
+    checker = VyreChecker(args.file, strict=args.strict, strictness=args.strictness, unsafe_exec=args.unsafe_exec)
     checker.check()
 
 if __name__ == "__main__":